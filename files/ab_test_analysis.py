@@ -8,15 +8,27 @@ Calculates statistical significance and provides recommendations.
 
 Usage:
     python ab_test_analysis.py --input analytics_data.json
+
+Input:
+    A JSON list of events, or {"events": [...]}, as tracked by AnalyticsService:
+    ab_test_assigned    sessionId, experimentId, variantId, variantName
+    ab_test_conversion  experimentId, variantId
+    session_end         sessionId, duration (milliseconds), eventCount
     
 Requirements:
+    Python 3.10+
     pip install scipy pandas numpy
+    pip install mmh3  # optional, smaller per-session memory
+    pip install ijson  # optional, streams large input files
+    pip install orjson  # optional, faster JSON parsing and export
 """
 
 import json
 import argparse
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache, partial
+from typing import Dict, Iterable, Iterator, Optional
 import math
 
 try:
@@ -29,8 +41,48 @@ except ImportError:
     print("Warning: scipy not available. Statistical tests will be limited.")
     print("Install with: pip install scipy pandas numpy")
 
+if SCIPY_AVAILABLE:
+    # z-scores for the default two-sided alpha=0.05 / power=0.8 design
+    Z_ALPHA_05 = float(stats.norm.ppf(0.975))
+    Z_BETA_80 = float(stats.norm.ppf(0.8))
+
+try:
+    import mmh3
+    MMH3_AVAILABLE = True
+except ImportError:
+    MMH3_AVAILABLE = False
+
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+
+# Reports kept per analyzer; entries are dropped oldest-first beyond this
+_REPORT_CACHE_SIZE = 64
+
+
+def _session_key(session_id):
+    """Key for a session id in user sets and the session index.
+
+    With mmh3, string ids are stored as 64-bit hashes (8-byte ints rather than
+    id strings); otherwise the id itself is used, which needs no hashing in Python.
+    """
+    if MMH3_AVAILABLE and isinstance(session_id, str):
+        return mmh3.hash64(session_id)[0]
+    return session_id
+
+
+@dataclass(slots=True)
 class VariantResults:
     """Results for a single variant"""
     variant_id: str
@@ -40,90 +92,269 @@ class VariantResults:
     conversion_rate: float
     avg_session_duration: float
     avg_interactions: float
+
+
+def _welford_update(stats_tuple, x):
+    """Fold one observation into a running (count, mean, M2) tuple.
+
+    Welford's algorithm gives the mean (and variance as M2 / (count - 1))
+    in a single pass without keeping the observations around.
+    """
+    n, mean, m2 = stats_tuple
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    m2 += delta * (x - mean)
+    return n, mean, m2
+
+
+def _z_scores(alpha: float, power: float):
+    """Two-sided z_alpha and z_beta for a design (requires scipy)"""
+    if alpha == 0.05 and power == 0.8:
+        return Z_ALPHA_05, Z_BETA_80
+    return stats.norm.ppf(1 - alpha/2), stats.norm.ppf(power)
+
+
+def _metric(value) -> Optional[float]:
+    """A session metric as a number, or None if it is missing or non-numeric"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+@lru_cache(maxsize=128)
+def _sample_size(baseline_rate: float, mde: float, alpha: float, power: float) -> int:
+    """Per-variant sample size for a two-proportion test (requires scipy)"""
+    # Convert rates to proportions
+    p1 = baseline_rate / 100
+    p2 = p1 * (1 + mde / 100)
     
-    def __post_init__(self):
-        if self.total_users > 0:
-            self.conversion_rate = (self.conversions / self.total_users) * 100
-        else:
-            self.conversion_rate = 0.0
+    # Calculate effect size (Cohen's h)
+    effect_size = 2 * (math.asin(math.sqrt(p2)) - math.asin(math.sqrt(p1)))
+    
+    # Calculate sample size using power analysis
+    z_alpha, z_beta = _z_scores(alpha, power)
+    
+    n = ((z_alpha + z_beta) ** 2) / (effect_size ** 2)
+    
+    return int(math.ceil(n))
+
+
+@dataclass(slots=True)
+class _VarState:
+    """Running aggregation state for one variant"""
+    name: Optional[str] = None
+    users: set = field(default_factory=set)
+    conversions: int = 0
+    # Welford (count, mean, M2) for session duration and interactions
+    sd_n: int = 0
+    sd_mean: float = 0.0
+    sd_m2: float = 0.0
+    ia_n: int = 0
+    ia_mean: float = 0.0
+    ia_m2: float = 0.0
+
+
+# Report text templates, formatted once per experiment / variant / comparison
+_REPORT_HEADER = "\n".join([
+    "=" * 80,
+    "A/B TEST REPORT: {experiment_id}",
+    "=" * 80,
+    "",
+    "VARIANT PERFORMANCE",
+    "-" * 80,
+])
+
+_VARIANT_BLOCK = "\n".join([
+    "\n{name} ({uid}):",
+    "  Total Users:       {users:,}",
+    "  Conversions:       {conversions:,}",
+    "  Conversion Rate:   {rate:.2f}%",
+    "  Avg Session:       {session:.1f}s",
+    "  Avg Interactions:  {interactions:.1f}",
+]).format
+
+_ANALYSIS_HEADER = "\n".join([
+    "\n" + "=" * 80,
+    "STATISTICAL ANALYSIS",
+    "=" * 80,
+])
+
+_COMPARISON_BLOCK = "\n".join([
+    "\n{name} vs {control}:",
+    "-" * 80,
+    "  Conversion Rate Difference: {diff:+.2f}%",
+    "  Relative Lift:              {lift:+.2f}%",
+    "  P-value:                    {p:.4f}",
+    "  Confidence Level:           {confidence:.2f}%",
+    "  Statistically Significant:  {significant}",
+    "  Sample Size Adequate:       {adequate}",
+    "\n  Recommendation:",
+    "    {recommendation}",
+]).format
 
 
 class ABTestAnalyzer:
     """Analyzes A/B test results and provides statistical insights"""
     
-    def __init__(self, data: List[Dict]):
-        self.data = data
-        self.experiments = {}
-        self._process_data()
+    def __init__(self, events: Iterable[Dict]):
+        # experiment_id -> variant_id -> _VarState, created on first assignment.
+        # Only _handle_assign indexes it directly, so reads never create entries
+        self._experiments = defaultdict(partial(defaultdict, _VarState))
+        self.exp_arrays = {}
+        self.event_count = 0
+        # Per-experiment revision, bumped on every write; keys the report cache
+        self._revs = {}
+        # experiment_id -> (revision, report text), at most _REPORT_CACHE_SIZE entries
+        self._report_cache = {}
+        # Sessions are tracked by _session_key (a 64-bit hash when mmh3 is installed).
+        # Maps each session to the (experiment_id, variant bucket) pairs it was
+        # assigned to, so session_end is attributed with a single lookup
+        self._session_index = {}
+        self.add_events(events)
     
-    def _process_data(self):
-        """Process raw analytics data into experiment results"""
+    @property
+    def experiments(self) -> Dict[str, Dict[str, _VarState]]:
+        """Aggregation state by experiment and variant, as plain dicts"""
+        return {exp_id: dict(variants) for exp_id, variants in self._experiments.items()}
+    
+    def add_events(self, events: Iterable[Dict]):
+        """Fold further analytics events into the existing results"""
+        self._process_data(events)
+        self._build_arrays()
+    
+    def _process_data(self, events: Iterable[Dict]):
+        """Process raw analytics events into experiment results in a single pass"""
         # Group events by experiment and variant
-        for event in self.data:
-            if event.get('name') == 'ab_test_assigned':
-                exp_id = event.get('experimentId')
-                var_id = event.get('variantId')
-                
-                if exp_id not in self.experiments:
-                    self.experiments[exp_id] = {}
-                
-                if var_id not in self.experiments[exp_id]:
-                    self.experiments[exp_id][var_id] = {
-                        'name': event.get('variantName', var_id),
-                        'users': set(),
-                        'conversions': 0,
-                        'session_durations': [],
-                        'interactions': [],
-                    }
-                
-                self.experiments[exp_id][var_id]['users'].add(event.get('sessionId'))
+        dispatch = self._DISPATCH
+        count = 0
+        for event in events:
+            count += 1
+            handler = dispatch.get(event.get('name'))
+            if handler is not None:
+                handler(self, event)
+        self.event_count += count
+    
+    def _handle_assign(self, event: Dict):
+        try:
+            exp_id = event['experimentId']
+            var_id = event['variantId']
+            session_id = event['sessionId']
+        except KeyError:
+            # Event is missing a required field; skip it
+            return
+        key = _session_key(session_id)
+        
+        bucket = self._experiments[exp_id][var_id]
+        if key not in bucket.users:
+            if bucket.name is None:
+                bucket.name = event.get('variantName', var_id)
+            bucket.users.add(key)
+            # Assignment precedes session_end for a session, so the index is ready
+            # in time; repeated assignments are indexed once
+            self._session_index.setdefault(key, []).append((exp_id, bucket))
+            self._revs[exp_id] = self._revs.get(exp_id, 0) + 1
+    
+    def _handle_convert(self, event: Dict):
+        try:
+            exp_id = event['experimentId']
+            var_id = event['variantId']
+        except KeyError:
+            return
+        bucket = self._experiments.get(exp_id, {}).get(var_id)
+        if bucket is not None:
+            bucket.conversions += 1
+            self._revs[exp_id] += 1
+    
+    def _handle_end(self, event: Dict):
+        try:
+            session_id = event['sessionId']
+        except KeyError:
+            return
+        # The frontend reports duration in milliseconds; averages are in seconds
+        duration = _metric(event.get('duration'))
+        if duration is not None:
+            duration /= 1000
+        interactions = _metric(event.get('eventCount'))
+        if duration is None and interactions is None:
+            return
+        
+        for exp_id, bucket in self._session_index.get(_session_key(session_id), ()):
+            self._revs[exp_id] += 1
             
-            elif event.get('name') == 'ab_test_conversion':
-                exp_id = event.get('experimentId')
-                var_id = event.get('variantId')
-                
-                if exp_id in self.experiments and var_id in self.experiments[exp_id]:
-                    self.experiments[exp_id][var_id]['conversions'] += 1
+            if duration is not None:
+                bucket.sd_n, bucket.sd_mean, bucket.sd_m2 = _welford_update(
+                    (bucket.sd_n, bucket.sd_mean, bucket.sd_m2), duration)
+            if interactions is not None:
+                bucket.ia_n, bucket.ia_mean, bucket.ia_m2 = _welford_update(
+                    (bucket.ia_n, bucket.ia_mean, bucket.ia_m2), interactions)
+    
+    # Event name -> handler; events with any other name are ignored
+    _DISPATCH = {
+        'ab_test_assigned': _handle_assign,
+        'ab_test_conversion': _handle_convert,
+        'session_end': _handle_end,
+    }
+    
+    def _build_arrays(self):
+        """Lay out per-variant aggregates as parallel arrays (one per metric)"""
+        for exp_id, variants in self._experiments.items():
+            buckets = list(variants.values())
+            columns = {
+                'users': [len(b.users) for b in buckets],
+                'conversions': [b.conversions for b in buckets],
+                'sd_mean': [b.sd_mean for b in buckets],
+                'ia_mean': [b.ia_mean for b in buckets],
+            }
+            if SCIPY_AVAILABLE:
+                columns = {
+                    'users': np.array(columns['users'], dtype=np.int64),
+                    'conversions': np.array(columns['conversions'], dtype=np.int64),
+                    'sd_mean': np.array(columns['sd_mean'], dtype=np.float64),
+                    'ia_mean': np.array(columns['ia_mean'], dtype=np.float64),
+                }
             
-            elif event.get('name') == 'session_end':
-                # Track session metrics per variant (would need to join with assignment)
-                pass
+            self.exp_arrays[exp_id] = {
+                'var_ids': list(variants),
+                'names': [b.name for b in buckets],
+                **columns,
+            }
     
     def get_variant_results(self, experiment_id: str) -> Dict[str, VariantResults]:
         """Get results for all variants in an experiment"""
-        if experiment_id not in self.experiments:
+        arrays = self.exp_arrays.get(experiment_id)
+        if arrays is None:
             return {}
         
-        results = {}
-        for var_id, data in self.experiments[experiment_id].items():
-            results[var_id] = VariantResults(
+        users = arrays['users']
+        conversions = arrays['conversions']
+        sd_mean = arrays['sd_mean']
+        ia_mean = arrays['ia_mean']
+        
+        if SCIPY_AVAILABLE:
+            # Whole-table ops; a zero-user variant has zero conversions, so rate is 0
+            rates = (conversions / np.maximum(users, 1) * 100).tolist()
+            users, conversions = users.tolist(), conversions.tolist()
+            sd_mean, ia_mean = sd_mean.tolist(), ia_mean.tolist()
+        else:
+            rates = [c / u * 100 if u else 0.0 for c, u in zip(conversions, users)]
+        
+        return {
+            var_id: VariantResults(
                 variant_id=var_id,
-                variant_name=data['name'],
-                total_users=len(data['users']),
-                conversions=data['conversions'],
-                conversion_rate=0,  # Calculated in __post_init__
-                avg_session_duration=np.mean(data['session_durations']) if data['session_durations'] else 0,
-                avg_interactions=np.mean(data['interactions']) if data['interactions'] else 0,
+                variant_name=name,
+                total_users=u,
+                conversions=c,
+                conversion_rate=r,
+                avg_session_duration=sd,
+                avg_interactions=ia,
             )
-        
-        return results
+            for var_id, name, u, c, r, sd, ia in zip(
+                arrays['var_ids'], arrays['names'], users, conversions, rates, sd_mean, ia_mean)
+        }
     
     def calculate_significance(self, variant_a: VariantResults, variant_b: VariantResults) -> Dict:
         """Calculate statistical significance between two variants"""
-        if not SCIPY_AVAILABLE:
-            return {
-                'error': 'scipy not available',
-                'significant': False,
-            }
-        
-        # Chi-square test for conversion rates
-        observed = np.array([
-            [variant_a.conversions, variant_a.total_users - variant_a.conversions],
-            [variant_b.conversions, variant_b.total_users - variant_b.conversions]
-        ])
-        
-        chi2, p_value, dof, expected = stats.chi2_contingency(observed)
-        
         # Calculate confidence interval for difference
         rate_diff = variant_b.conversion_rate - variant_a.conversion_rate
         
@@ -131,6 +362,36 @@ class ABTestAnalyzer:
         relative_lift = ((variant_b.conversion_rate - variant_a.conversion_rate) / 
                         variant_a.conversion_rate * 100) if variant_a.conversion_rate > 0 else 0
         
+        # Underpowered comparisons are reported as "continue test"; skip the test
+        if not self._check_sample_size(variant_a, variant_b):
+            return {
+                'p_value': 1.0,
+                'significant': False,
+                'confidence_level': 0.0,
+                'rate_difference': rate_diff,
+                'relative_lift': relative_lift,
+                'chi_square': 0.0,
+                'sample_size_adequate': False,
+            }
+        
+        # Chi-square test for conversion rates, in closed form for the 2x2 table
+        # [[a, b], [c, d]] with Yates' correction (matches scipy's chi2_contingency)
+        a = variant_a.conversions
+        b = variant_a.total_users - a
+        c = variant_b.conversions
+        d = variant_b.total_users - c
+        n = a + b + c + d
+        
+        den = (a + b) * (c + d) * (a + c) * (b + d)
+        if den:
+            num = n * max(abs(a * d - b * c) - n / 2, 0) ** 2
+            chi2 = num / den
+        else:
+            chi2 = 0.0
+        
+        # Survival function of chi-square with 1 degree of freedom
+        p_value = math.erfc(math.sqrt(chi2 / 2))
+        
         return {
             'p_value': p_value,
             'significant': p_value < 0.05,
@@ -138,7 +399,7 @@ class ABTestAnalyzer:
             'rate_difference': rate_diff,
             'relative_lift': relative_lift,
             'chi_square': chi2,
-            'sample_size_adequate': self._check_sample_size(variant_a, variant_b),
+            'sample_size_adequate': True,
         }
     
     def _check_sample_size(self, variant_a: VariantResults, variant_b: VariantResults) -> bool:
@@ -161,23 +422,52 @@ class ABTestAnalyzer:
         if not SCIPY_AVAILABLE:
             return 0
         
-        # Convert rates to proportions
+        return _sample_size(baseline_rate, minimum_detectable_effect, alpha, power)
+    
+    def calculate_sample_size_grid(self,
+                                   baseline_rate: float,
+                                   mdes: "np.ndarray",
+                                   alpha: float = 0.05,
+                                   power: float = 0.8) -> "np.ndarray":
+        """Calculate required sample size for each minimum detectable effect in mdes"""
+        if not SCIPY_AVAILABLE:
+            raise RuntimeError("scipy and numpy are required: pip install scipy pandas numpy")
+        
+        # Same math as calculate_sample_size_needed, over the whole grid at once
+        mdes = np.asarray(mdes, dtype=np.float64)
         p1 = baseline_rate / 100
-        p2 = p1 * (1 + minimum_detectable_effect / 100)
+        p2 = p1 * (1 + mdes / 100)
         
-        # Calculate effect size (Cohen's h)
-        effect_size = 2 * (math.asin(math.sqrt(p2)) - math.asin(math.sqrt(p1)))
+        # No finite sample size exists without an effect or outside [0, 1]
+        invalid = ~np.isfinite(p2) | (p2 < 0) | (p2 > 1) | (p2 == p1)
+        if not 0 <= p1 <= 1 or invalid.any():
+            raise ValueError(f"No sample size for baseline_rate={baseline_rate} "
+                             f"and minimum detectable effects {mdes[invalid].tolist()}")
         
-        # Calculate sample size using power analysis
-        z_alpha = stats.norm.ppf(1 - alpha/2)
-        z_beta = stats.norm.ppf(power)
+        effect_size = 2 * (np.arcsin(np.sqrt(p2)) - np.arcsin(np.sqrt(p1)))
         
+        z_alpha, z_beta = _z_scores(alpha, power)
         n = ((z_alpha + z_beta) ** 2) / (effect_size ** 2)
         
-        return int(math.ceil(n))
+        return np.ceil(n).astype(np.int64)
     
     def generate_report(self, experiment_id: str) -> str:
         """Generate a human-readable report for an experiment"""
+        rev = self._revs.get(experiment_id, 0)
+        cached = self._report_cache.get(experiment_id)
+        if cached is not None and cached[0] == rev:
+            return cached[1]
+        
+        report = self._build_report(experiment_id)
+        # Replacing the entry drops the stale revision; evict the oldest when full
+        self._report_cache.pop(experiment_id, None)
+        if len(self._report_cache) >= _REPORT_CACHE_SIZE:
+            del self._report_cache[next(iter(self._report_cache))]
+        self._report_cache[experiment_id] = (rev, report)
+        return report
+    
+    def _build_report(self, experiment_id: str) -> str:
+        """Build the report text for an experiment's current data"""
         results = self.get_variant_results(experiment_id)
         
         if len(results) < 2:
@@ -187,76 +477,86 @@ class ABTestAnalyzer:
         variants = list(results.values())
         control = variants[0]  # Assume first variant is control
         
-        report = []
-        report.append("=" * 80)
-        report.append(f"A/B TEST REPORT: {experiment_id}")
-        report.append("=" * 80)
-        report.append("")
-        
-        # Overall summary
-        report.append("VARIANT PERFORMANCE")
-        report.append("-" * 80)
-        for variant in variants:
-            report.append(f"\n{variant.variant_name} ({variant.variant_id}):")
-            report.append(f"  Total Users:       {variant.total_users:,}")
-            report.append(f"  Conversions:       {variant.conversions:,}")
-            report.append(f"  Conversion Rate:   {variant.conversion_rate:.2f}%")
-            report.append(f"  Avg Session:       {variant.avg_session_duration:.1f}s")
-            report.append(f"  Avg Interactions:  {variant.avg_interactions:.1f}")
+        report = [_REPORT_HEADER.format(experiment_id=experiment_id)]
+        report.extend(
+            _VARIANT_BLOCK(name=v.variant_name, uid=v.variant_id, users=v.total_users,
+                           conversions=v.conversions, rate=v.conversion_rate,
+                           session=v.avg_session_duration, interactions=v.avg_interactions)
+            for v in variants
+        )
         
         # Statistical comparison
-        report.append("\n" + "=" * 80)
-        report.append("STATISTICAL ANALYSIS")
-        report.append("=" * 80)
+        report.append(_ANALYSIS_HEADER)
         
-        for i, variant in enumerate(variants[1:], 1):
-            report.append(f"\n{variant.variant_name} vs {control.variant_name}:")
-            report.append("-" * 80)
-            
+        control_name = control.variant_name
+        for variant in variants[1:]:
+            name = variant.variant_name
             sig = self.calculate_significance(control, variant)
-            
-            if 'error' in sig:
-                report.append(f"  Error: {sig['error']}")
-                continue
-            
-            report.append(f"  Conversion Rate Difference: {sig['rate_difference']:+.2f}%")
-            report.append(f"  Relative Lift:              {sig['relative_lift']:+.2f}%")
-            report.append(f"  P-value:                    {sig['p_value']:.4f}")
-            report.append(f"  Confidence Level:           {sig['confidence_level']:.2f}%")
-            report.append(f"  Statistically Significant:  {'✓ YES' if sig['significant'] else '✗ NO'}")
-            report.append(f"  Sample Size Adequate:       {'✓ YES' if sig['sample_size_adequate'] else '✗ NO'}")
+            significant = sig['significant']
+            adequate = sig['sample_size_adequate']
+            lift = sig['relative_lift']
             
             # Recommendation
-            report.append("\n  Recommendation:")
-            if not sig['sample_size_adequate']:
+            if not adequate:
                 needed = self.calculate_sample_size_needed(
                     control.conversion_rate, 
                     10  # 10% minimum detectable effect
                 )
-                report.append(f"    Continue test - need ~{needed:,} users per variant")
-            elif sig['significant'] and sig['relative_lift'] > 0:
-                report.append(f"    ✓ IMPLEMENT {variant.variant_name} - Shows significant improvement")
-            elif sig['significant'] and sig['relative_lift'] < 0:
-                report.append(f"    ✗ REJECT {variant.variant_name} - Shows significant decline")
+                recommendation = f"Continue test - need ~{needed:,} users per variant"
+            elif significant and lift > 0:
+                recommendation = f"✓ IMPLEMENT {name} - Shows significant improvement"
+            elif significant and lift < 0:
+                recommendation = f"✗ REJECT {name} - Shows significant decline"
             else:
-                report.append(f"    = NO CLEAR WINNER - Consider running longer or testing other variables")
+                recommendation = "= NO CLEAR WINNER - Consider running longer or testing other variables"
+            
+            report.append(_COMPARISON_BLOCK(
+                name=name, control=control_name, diff=sig['rate_difference'], lift=lift,
+                p=sig['p_value'], confidence=sig['confidence_level'],
+                significant='✓ YES' if significant else '✗ NO',
+                adequate='✓ YES' if adequate else '✗ NO',
+                recommendation=recommendation,
+            ))
         
         report.append("\n" + "=" * 80)
         return "\n".join(report)
 
 
-def load_analytics_data(filepath: str) -> List[Dict]:
-    """Load analytics data from JSON file"""
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    
-    # Handle different data formats
-    if isinstance(data, dict) and 'events' in data:
-        return data['events']
-    elif isinstance(data, list):
-        return data
-    else:
-        raise ValueError("Unexpected data format")
+def load_events(filepath: str) -> Iterator[Dict]:
+    """Stream analytics events from a JSON file ({"events": [...]} or a bare list)"""
+    with open(filepath, 'rb') as f:
+        # The first significant byte tells the two supported layouts apart
+        peek = f.read(1)
+        while peek.isspace():
+            peek = f.read(1)
+        f.seek(0)
+        
+        if peek == b'{':
+            prefix = 'events.item'
+        elif peek == b'[':
+            prefix = 'item'
+        else:
+            raise ValueError("Unexpected data format")
+        
+        if IJSON_AVAILABLE:
+            empty = True
+            for event in ijson.items(f, prefix, use_float=True):
+                empty = False
+                yield event
+            # An object with no events may just be the wrong file; tell it
+            # apart from {"events": []} with a second look at its keys
+            if empty and prefix == 'events.item':
+                f.seek(0)
+                if not any(key == 'events' for key, _ in ijson.kvitems(f, '')):
+                    raise ValueError("Unexpected data format: no 'events' key")
+            return
+        
+        data = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
+        if prefix == 'events.item':
+            if 'events' not in data:
+                raise ValueError("Unexpected data format: no 'events' key")
+            data = data['events']
+        yield from data
 
 
 def main():
@@ -271,11 +571,11 @@ def main():
     
     # Load data
     print(f"Loading data from {args.input}...")
-    data = load_analytics_data(args.input)
-    print(f"Loaded {len(data)} events")
+    events = load_events(args.input)
     
     # Analyze
-    analyzer = ABTestAnalyzer(data)
+    analyzer = ABTestAnalyzer(events)
+    print(f"Loaded {analyzer.event_count} events")
     
     # Generate reports
     if args.experiment:
@@ -294,16 +594,23 @@ def main():
     
     # Save output
     if args.output:
-        with open(args.output, 'w') as f:
-            if args.format == 'text':
+        if args.format == 'text':
+            with open(args.output, 'w') as f:
                 f.write('\n\n'.join(reports))
-            else:  # json
-                json.dump({
-                    'experiments': {
-                        exp_id: analyzer.get_variant_results(exp_id)
-                        for exp_id in experiments
-                    }
-                }, f, indent=2, default=lambda o: o.__dict__)
+        else:  # json
+            payload = {
+                'experiments': {
+                    exp_id: analyzer.get_variant_results(exp_id)
+                    for exp_id in experiments
+                }
+            }
+            if ORJSON_AVAILABLE:
+                # orjson serializes dataclasses natively
+                with open(args.output, 'wb') as f:
+                    f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(args.output, 'w') as f:
+                    json.dump(payload, f, indent=2, default=asdict)
         print(f"\nReport saved to {args.output}")
 
 
@@ -329,10 +636,10 @@ python ab_test_analysis.py --input analytics_data.json --output report.txt
 python ab_test_analysis.py --input analytics_data.json --format json --output results.json
 
 # Using in Python:
-from ab_test_analysis import ABTestAnalyzer
+from ab_test_analysis import ABTestAnalyzer, load_events
 
-data = load_analytics_data('analytics_data.json')
-analyzer = ABTestAnalyzer(data)
+events = load_events('analytics_data.json')  # streamed lazily
+analyzer = ABTestAnalyzer(events)
 report = analyzer.generate_report('landing_style')
 print(report)
 
@@ -344,4 +651,8 @@ needed = analyzer.calculate_sample_size_needed(
     power=0.8                 # 80% power
 )
 print(f"Need {needed} users per variant")
+
+# Sample sizes for a grid of detectable effects (5%, 10%, ..., 50% lift):
+import numpy as np
+grid = analyzer.calculate_sample_size_grid(5.0, np.arange(5, 55, 5))
 """
\ No newline at end of file